@@ -2,32 +2,53 @@ import os
 import sys
 import csv
 import json
+import re
 import hashlib
 import asyncio
 import ssl as sslmod
 import socket
+import concurrent.futures as cf
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
+import numpy as np
+import scipy.fft
 from PIL import Image
-import imagehash
 import pytesseract
 import aiohttp
 from aiohttp import ClientSession
 from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+BLOCKED_RESOURCES = {"media", "font"}
+OCR_POOL = cf.ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+TRUSTED_ISSUERS = ["let's encrypt", "google trust services", "sectigo", "digicert", "globalsign", "amazon", "buypass", "godaddy"]
+TRUSTED_ISSUER_RE = re.compile("|".join(re.escape(t) for t in TRUSTED_ISSUERS))
+PHASH_SIZE = 8
+PHASH_SAMPLE = 32
 
 def read_domains(path: str) -> List[str]:
+    truthy = {"1", "true", "yes"}
+    out = []
     with open(path, "r", encoding="utf-8", newline="") as f:
-        r = csv.DictReader(f)
-        out = []
+        r = csv.reader(f)
+        header = [str(h).strip().lower() for h in next(r, [])]
+        try:
+            di = header.index("domain")
+            vi = header.index("resolvable")
+            gi = header.index("registered")
+        except ValueError:
+            return []
+        n = max(di, vi, gi)
         for row in r:
-            d = str(row.get("domain", "")).strip().lower()
-            res = str(row.get("resolvable", "")).strip().lower() in {"1", "true", "yes"}
-            reg = str(row.get("registered", "")).strip().lower() in {"1", "true", "yes"}
-            if d and res and reg:
-                out.append(d)
+            if len(row) > n and row[vi].strip().lower() in truthy and row[gi].strip().lower() in truthy:
+                d = row[di].strip().lower()
+                if d:
+                    out.append(d)
     return out
 
 async def fetch_ssl_info(domain: str, timeout: float = 10.0) -> Dict[str, str]:
@@ -78,58 +99,80 @@ def flag_ssl(cert: Dict[str, str]) -> Dict[str, bool]:
         if issuer:
             if "commonname=%s" % "%s" in issuer:
                 flags["self_signed"] = True
-            trusted = ["let's encrypt", "google trust services", "sectigo", "digicert", "globalsign", "amazon", "buypass", "godaddy"]
-            if not any(t in issuer for t in trusted):
+            if TRUSTED_ISSUER_RE.search(issuer) is None:
                 flags["untrusted"] = True
     except Exception:
         pass
     return flags
 
 async def download_file(session: ClientSession, url: str, path: str, timeout: float = 20.0) -> bool:
+    tmp = path + ".part"
     try:
         async with session.get(url, timeout=timeout) as resp:
             if resp.status != 200:
                 return False
-            data = await resp.read()
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "wb") as f:
-            f.write(data)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                async for chunk in resp.content.iter_chunked(1 << 16):
+                    f.write(chunk)
+        os.replace(tmp, path)
         return True
     except Exception:
+        try:
+            os.unlink(tmp)
+        except Exception:
+            pass
         return False
 
+def write_json(path: str, obj) -> None:
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False)
+
 def compute_md5(path: str) -> str:
     try:
-        h = hashlib.md5()
         with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        return h.hexdigest()
+            return hashlib.md5(f.read()).hexdigest()
     except Exception:
         return ""
 
 def compute_phash(path: str) -> str:
     try:
         with Image.open(path) as im:
-            return str(imagehash.phash(im))
+            px = np.asarray(im.convert("L").resize((PHASH_SAMPLE, PHASH_SAMPLE), Image.LANCZOS))
+        low = scipy.fft.dct(scipy.fft.dct(px, axis=0), axis=1)[:PHASH_SIZE, :PHASH_SIZE]
+        bits = (low > np.median(low)).flatten()
+        return "%016x" % int("".join("1" if b else "0" for b in bits), 2)
     except Exception:
         return ""
 
-async def capture_page(pw, domain: str, out_dir: str) -> Tuple[str, str, str]:
+async def block_route(route) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def capture_page(browser, domain: str, out_dir: str) -> Tuple[str, str, str]:
     url = "https://" + domain
-    browser = await pw.chromium.launch(headless=True)
     context = await browser.new_context(user_agent=UA, viewport={"width": 1920, "height": 1080})
+    await context.route("**/*", block_route)
     page = await context.new_page()
     try:
-        await page.goto(url, wait_until="networkidle", timeout=45000)
+        await page.goto(url, wait_until="domcontentloaded", timeout=45000)
     except Exception:
         try:
             url = "http://" + domain
-            await page.goto(url, wait_until="networkidle", timeout=45000)
+            await page.goto(url, wait_until="domcontentloaded", timeout=45000)
         except Exception:
             await context.close()
-            await browser.close()
             return "", "", ""
+    try:
+        await page.wait_for_load_state("networkidle", timeout=10000)
+    except Exception:
+        pass
     full_png = os.path.join(out_dir, "full.png")
     top_png = os.path.join(out_dir, "top.png")
     html_path = os.path.join(out_dir, "page.html")
@@ -148,13 +191,14 @@ async def capture_page(pw, domain: str, out_dir: str) -> Tuple[str, str, str]:
     except Exception:
         pass
     await context.close()
-    await browser.close()
     return full_png, top_png, html_path
 
-def parse_meta(html: str) -> Dict[str, str]:
+def parse_html(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, "lxml")
+
+def parse_meta(soup: BeautifulSoup) -> Dict[str, str]:
     out = {}
     try:
-        soup = BeautifulSoup(html, "html.parser")
         t = soup.find("title")
         if t and t.text:
             out["title"] = t.text.strip()
@@ -171,9 +215,8 @@ def parse_meta(html: str) -> Dict[str, str]:
         pass
     return out
 
-def extract_favicon_url(html: str, base_url: str) -> str:
+def extract_favicon_url(soup: BeautifulSoup, base_url: str) -> str:
     try:
-        soup = BeautifulSoup(html, "html.parser")
         link = soup.find("link", rel=lambda v: v and "icon" in v)
         if link and link.get("href"):
             href = link.get("href").strip()
@@ -186,10 +229,9 @@ def extract_favicon_url(html: str, base_url: str) -> str:
         pass
     return base_url.rstrip("/") + "/favicon.ico"
 
-def extract_images(html: str, base_url: str) -> List[str]:
+def extract_images(soup: BeautifulSoup, base_url: str) -> List[str]:
     urls = []
     try:
-        soup = BeautifulSoup(html, "html.parser")
         for img in soup.find_all("img"):
             src = img.get("src")
             if not src:
@@ -205,16 +247,23 @@ def extract_images(html: str, base_url: str) -> List[str]:
         pass
     return urls
 
-async def ocr_image(path: str) -> str:
+def ocr_image(path: str) -> str:
     try:
-        return pytesseract.image_to_string(Image.open(path))
+        with Image.open(path) as im:
+            return pytesseract.image_to_string(im)
     except Exception:
         return ""
 
-async def process_domain(pw, session: ClientSession, domain: str, out_root: str) -> None:
+async def process_domain(browser, session: ClientSession, domain: str, out_root: str) -> None:
     ddir = os.path.join(out_root, domain)
     os.makedirs(ddir, exist_ok=True)
-    full_png, top_png, html_path = await capture_page(pw, domain, ddir)
+    base_url = "https://" + domain
+    guess_url = base_url + "/favicon.ico"
+    fav_path = os.path.join(ddir, "favicon.png")
+    guess_path = fav_path + ".guess"
+    fav_task = asyncio.create_task(download_file(session, guess_url, guess_path))
+    ssl_task = asyncio.create_task(fetch_ssl_info(domain))
+    full_png, top_png, html_path = await capture_page(browser, domain, ddir)
     html = ""
     if os.path.isfile(html_path):
         try:
@@ -222,21 +271,12 @@ async def process_domain(pw, session: ClientSession, domain: str, out_root: str)
                 html = f.read()
         except Exception:
             html = ""
-    meta = parse_meta(html) if html else {}
-    with open(os.path.join(ddir, "meta.json"), "w", encoding="utf-8") as f:
-        json.dump(meta, f, ensure_ascii=False)
-    base_url = "https://" + domain
-    fav_url = extract_favicon_url(html or "", base_url)
-    fav_path = os.path.join(ddir, "favicon.png")
-    ok = await download_file(session, fav_url, fav_path)
-    if ok:
-        md5 = compute_md5(fav_path)
-        ph = compute_phash(fav_path)
-        with open(os.path.join(ddir, "favicon_md5.txt"), "w", encoding="utf-8") as f:
-            f.write(md5)
-        with open(os.path.join(ddir, "favicon_phash.txt"), "w", encoding="utf-8") as f:
-            f.write(ph)
-    imgs = extract_images(html or "", base_url)
+    soup = parse_html(html or "")
+    meta = parse_meta(soup) if html else {}
+    write_json(os.path.join(ddir, "meta.json"), meta)
+    fav_url = extract_favicon_url(soup, base_url)
+    decl_task = asyncio.create_task(download_file(session, fav_url, fav_path)) if fav_url != guess_url else None
+    imgs = extract_images(soup, base_url)
     imgs_dir = os.path.join(ddir, "images")
     os.makedirs(imgs_dir, exist_ok=True)
     dl_tasks = []
@@ -245,24 +285,42 @@ async def process_domain(pw, session: ClientSession, domain: str, out_root: str)
         dl_tasks.append(download_file(session, u, ipath))
     if dl_tasks:
         await asyncio.gather(*dl_tasks, return_exceptions=True)
+    guessed = await fav_task
+    if decl_task is not None and await decl_task:
+        ok = True
+    elif guessed:
+        try:
+            os.replace(guess_path, fav_path)
+            ok = True
+        except Exception:
+            ok = False
+    else:
+        ok = False
+    try:
+        os.unlink(guess_path)
+    except Exception:
+        pass
+    if ok:
+        md5 = compute_md5(fav_path)
+        ph = compute_phash(fav_path)
+        with open(os.path.join(ddir, "favicon_md5.txt"), "w", encoding="utf-8") as f:
+            f.write(md5)
+        with open(os.path.join(ddir, "favicon_phash.txt"), "w", encoding="utf-8") as f:
+            f.write(ph)
+    names = [n for n in sorted(os.listdir(imgs_dir)) if os.path.isfile(os.path.join(imgs_dir, n))]
+    loop = asyncio.get_running_loop()
+    texts = await asyncio.gather(*[loop.run_in_executor(OCR_POOL, ocr_image, os.path.join(imgs_dir, n)) for n in names], return_exceptions=True)
     ocr_texts = []
-    for name in sorted(os.listdir(imgs_dir)):
-        p = os.path.join(imgs_dir, name)
-        if os.path.isfile(p):
-            try:
-                txt = await ocr_image(p)
-            except Exception:
-                txt = ""
-            if txt:
-                ocr_texts.append({"file": name, "text": txt})
+    for name, txt in zip(names, texts):
+        if isinstance(txt, str) and txt:
+            ocr_texts.append({"file": name, "text": txt})
     with open(os.path.join(ddir, "ocr_text.txt"), "w", encoding="utf-8") as f:
         for item in ocr_texts:
             f.write(item["file"] + "\n")
             f.write(item["text"] + "\n\n")
-    cert = await fetch_ssl_info(domain)
+    cert = await ssl_task
     flags = flag_ssl(cert) if cert else {}
-    with open(os.path.join(ddir, "ssl.json"), "w", encoding="utf-8") as f:
-        json.dump({"cert": cert, "flags": flags}, f, ensure_ascii=False)
+    write_json(os.path.join(ddir, "ssl.json"), {"cert": cert, "flags": flags})
 
 async def bounded_sem(sem, coro):
     async with sem:
@@ -277,21 +335,21 @@ async def run_pipeline():
     domains = []
     for p in files:
         domains.extend(read_domains(p))
-    seen = set()
-    uniq = []
-    for d in domains:
-        if d not in seen:
-            seen.add(d)
-            uniq.append(d)
+    uniq = list(dict.fromkeys(domains))
     sem = asyncio.Semaphore(5)
     async with async_playwright() as pw:
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for d in uniq:
-                tasks.append(bounded_sem(sem, process_domain(pw, session, d, out_root)))
-            for i in range(0, len(tasks), 50):
-                batch = tasks[i:i+50]
-                await asyncio.gather(*batch, return_exceptions=True)
+        browser = await pw.chromium.launch(headless=True)
+        try:
+            connector = aiohttp.TCPConnector(limit=500, limit_per_host=10, ttl_dns_cache=600)
+            async with aiohttp.ClientSession(connector=connector) as session:
+                tasks = []
+                for d in uniq:
+                    tasks.append(bounded_sem(sem, process_domain(browser, session, d, out_root)))
+                for i in range(0, len(tasks), 50):
+                    batch = tasks[i:i+50]
+                    await asyncio.gather(*batch, return_exceptions=True)
+        finally:
+            await browser.close()
 
 def main():
     try:
@@ -1,12 +1,17 @@
 import os
 import sys
 import csv
-import socket
+import asyncio
 import concurrent.futures as cf
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import time
 import threading
 import whois
+import aiohttp
+import dns.asyncresolver
+import dns.resolver
+
+RDAP_URL = "https://rdap.org/domain/"
 
 def read_domains(path: str) -> List[str]:
 	with open(path, "r", encoding="utf-8", newline="") as f:
@@ -34,13 +39,7 @@ def read_domains(path: str) -> List[str]:
 				d = str(row[0]).strip()
 				if d:
 					out.append(d)
-	seen = set()
-	uniq = []
-	for d in out:
-		if d not in seen:
-			seen.add(d)
-			uniq.append(d)
-	return uniq
+	return list(dict.fromkeys(out))
 
 def read_existing(path: str) -> Dict[str, Tuple[bool, bool]]:
 	if not os.path.isfile(path):
@@ -73,13 +72,26 @@ def idna(domain: str) -> str:
 	except Exception:
 		return domain
 
-def resolve(domain: str, timeout: float) -> bool:
+async def resolve(resolver: dns.asyncresolver.Resolver, sem: asyncio.Semaphore, domain: str) -> bool:
 	dn = idna(domain)
-	try:
-		res = socket.getaddrinfo(dn, None, proto=socket.IPPROTO_TCP, family=socket.AF_UNSPEC)
-		return bool(res)
-	except Exception:
-		return False
+	async with sem:
+		for rdtype in ("A", "AAAA"):
+			try:
+				ans = await resolver.resolve(dn, rdtype)
+				if ans:
+					return True
+			except dns.resolver.NXDOMAIN:
+				return False
+			except Exception:
+				continue
+	return False
+
+async def resolve_all(domains: List[str], timeout: float, concurrency: int) -> Dict[str, bool]:
+	resolver = dns.asyncresolver.Resolver()
+	resolver.lifetime = timeout
+	sem = asyncio.Semaphore(max(1, concurrency))
+	results = await asyncio.gather(*[resolve(resolver, sem, d) for d in domains], return_exceptions=True)
+	return {d: r is True for d, r in zip(domains, results)}
 
 def whois_registered(domain: str, timeout: float) -> bool:
 	dn = idna(domain)
@@ -103,34 +115,58 @@ def whois_registered(domain: str, timeout: float) -> bool:
 	except Exception:
 		return False
 
-def process_file(in_path: str, out_path: str, dns_workers: int, whois_workers: int, dns_timeout: float, whois_timeout: float) -> Tuple[int, int]:
+async def rdap_registered(session: aiohttp.ClientSession, sem: asyncio.Semaphore, domain: str) -> Optional[bool]:
+	dn = idna(domain)
+	async with sem:
+		try:
+			async with session.get(RDAP_URL + dn) as resp:
+				if resp.status == 200:
+					data = await resp.json(content_type=None)
+					return bool(data.get("events") or data.get("entities"))
+				if resp.status == 404 and resp.url.host != "rdap.org":
+					return False
+		except Exception:
+			pass
+	return None
+
+async def registered_all(domains: List[str], timeout: float, concurrency: int, whois_workers: int) -> Dict[str, bool]:
+	out: Dict[str, bool] = {}
+	if not domains:
+		return out
+	sem = asyncio.Semaphore(max(1, concurrency))
+	async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+		results = await asyncio.gather(*[rdap_registered(session, sem, d) for d in domains], return_exceptions=True)
+	fallback = []
+	for d, r in zip(domains, results):
+		if isinstance(r, bool):
+			out[d] = r
+		else:
+			fallback.append(d)
+	if fallback:
+		loop = asyncio.get_running_loop()
+		with cf.ThreadPoolExecutor(max_workers=max(1, whois_workers)) as ex:
+			oks = await asyncio.gather(*[loop.run_in_executor(ex, whois_registered, d, timeout) for d in fallback], return_exceptions=True)
+		for d, ok in zip(fallback, oks):
+			out[d] = ok is True
+	return out
+
+async def check_all(domains: List[str], dns_timeout: float, dns_concurrency: int, whois_timeout: float, rdap_concurrency: int, whois_workers: int) -> Tuple[Dict[str, bool], Dict[str, bool]]:
+	resolvable = await resolve_all(domains, dns_timeout, dns_concurrency)
+	targets = [d for d in domains if not resolvable.get(d, False)]
+	registered = await registered_all(targets, whois_timeout, rdap_concurrency, whois_workers)
+	return resolvable, registered
+
+def process_file(in_path: str, out_path: str, dns_concurrency: int, whois_workers: int, dns_timeout: float, whois_timeout: float, rdap_concurrency: int) -> Tuple[int, int]:
 	domains = read_domains(in_path)
 	cache = read_existing(out_path)
 	todo = [d for d in domains if d not in cache]
 	resolvable: Dict[str, bool] = {}
 	registered: Dict[str, bool] = {}
 	if todo:
-		with cf.ThreadPoolExecutor(max_workers=dns_workers) as ex:
-			futs = {ex.submit(resolve, d, dns_timeout): d for d in todo}
-			for f in cf.as_completed(futs):
-				d = futs[f]
-				try:
-					resolvable[d] = bool(f.result())
-				except Exception:
-					resolvable[d] = False
-		whois_targets = [d for d in todo if not resolvable.get(d, False)]
-		def whois_task(d: str) -> Tuple[str, bool]:
-			ok = whois_registered(d, whois_timeout)
-			return d, ok
-		with cf.ThreadPoolExecutor(max_workers=whois_workers) as ex:
-			futs = {ex.submit(whois_task, d): d for d in whois_targets}
-			for f in cf.as_completed(futs):
-				try:
-					d, ok = f.result()
-					registered[d] = ok
-				except Exception:
-					d = futs[f]
-					registered[d] = False
+		try:
+			resolvable, registered = asyncio.run(check_all(todo, dns_timeout, dns_concurrency, whois_timeout, rdap_concurrency, whois_workers))
+		except Exception:
+			resolvable, registered = {}, {}
 	rows = []
 	for d in domains:
 		if d in cache:
@@ -156,14 +192,15 @@ def main():
 	if not os.path.isdir(in_dir):
 		sys.exit(1)
 	os.makedirs(out_dir, exist_ok=True)
-	env_dns = os.getenv("LIFECHECK_DNS_WORKERS")
+	env_dns = os.getenv("LIFECHECK_DNS_CONCURRENCY") or os.getenv("LIFECHECK_DNS_WORKERS")
 	env_whois = os.getenv("LIFECHECK_WHOIS_WORKERS")
 	env_dns_timeout = os.getenv("LIFECHECK_DNS_TIMEOUT")
 	env_whois_timeout = os.getenv("LIFECHECK_WHOIS_TIMEOUT")
+	env_rdap = os.getenv("LIFECHECK_RDAP_CONCURRENCY")
 	try:
-		dns_workers = int(env_dns) if env_dns else max(8, (os.cpu_count() or 4) // 2)
+		dns_concurrency = int(env_dns) if env_dns else 500
 	except Exception:
-		dns_workers = max(8, (os.cpu_count() or 4) // 2)
+		dns_concurrency = 500
 	try:
 		whois_workers = int(env_whois) if env_whois else 8
 	except Exception:
@@ -176,13 +213,14 @@ def main():
 		whois_timeout = float(env_whois_timeout) if env_whois_timeout else 10.0
 	except Exception:
 		whois_timeout = 10.0
+	try:
+		rdap_concurrency = int(env_rdap) if env_rdap else 64
+	except Exception:
+		rdap_concurrency = 64
 	files = [f for f in os.listdir(in_dir) if f.lower().endswith(".csv")]
 	total = len(files)
 	if total == 0:
 		return
-	if not os.getenv("LIFECHECK_DNS_WORKERS"):
-		cpu = os.cpu_count() or 4
-		dns_workers = max(8, cpu // 2)
 	if not os.getenv("LIFECHECK_WHOIS_WORKERS"):
 		cpu = os.cpu_count() or 4
 		whois_workers = 8 if cpu < 16 else max(8, cpu // 4)
@@ -193,17 +231,17 @@ def main():
 		file_workers = None
 	if file_workers is None:
 		cpu = os.cpu_count() or 4
-		threads_per_file = dns_workers + whois_workers
+		threads_per_file = 1 + whois_workers
 		target_threads = cpu * 2
 		file_workers = max(1, min(total, max(1, target_threads // max(1, threads_per_file))))
-	print(f"files:{total} file_workers:{file_workers} dns_workers:{dns_workers} whois_workers:{whois_workers}", flush=True)
+	print(f"files:{total} file_workers:{file_workers} dns_concurrency:{dns_concurrency} whois_workers:{whois_workers}", flush=True)
 	start = time.time()
 	with cf.ThreadPoolExecutor(max_workers=file_workers) as ex:
 		futs = []
 		for name in files:
 			in_path = os.path.join(in_dir, name)
 			out_path = os.path.join(out_dir, name)
-			futs.append(ex.submit(process_file, in_path, out_path, dns_workers, whois_workers, dns_timeout, whois_timeout))
+			futs.append(ex.submit(process_file, in_path, out_path, dns_concurrency, whois_workers, dns_timeout, whois_timeout, rdap_concurrency))
 		done = 0
 		kept_total = 0
 		for i, f in enumerate(cf.as_completed(futs), 1):
@@ -1,52 +1,70 @@
 import os
 import sys
-import subprocess
 import csv
-from io import StringIO
+import multiprocessing
 from typing import List, Dict, Tuple, Optional
 import openpyxl
 import time
 import threading
 import concurrent.futures as cf
-import requests
+import asyncio
+import aiohttp
+import ijson
 import json
 import re
 import dns.resolver
+import dns.asyncresolver
 import gzip
+import zlib
+import hashlib
+import functools
 import tempfile
+from tqdm import tqdm
+try:
+    import orjson
+except ImportError:
+    orjson = None
+JSON_LOADS = orjson.loads if orjson is not None else json.loads
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-def read_whitelist(xlsx_path: str) -> List[str]:
+@functools.lru_cache(maxsize=8)
+def read_xlsx_rows(xlsx_path: str) -> Tuple[tuple, ...]:
+    if CalamineWorkbook is not None:
+        try:
+            wb = CalamineWorkbook.from_path(xlsx_path)
+            return tuple(tuple(r) for r in wb.get_sheet_by_index(0).to_python(skip_empty_area=False))
+        except Exception:
+            pass
     wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
-    ws = wb.active
-    headers = [str(c.value).strip().lower() if c.value is not None else "" for c in next(ws.iter_rows(min_row=1, max_row=1))]
     try:
-        if "whitelisted domains" in headers:
-            col_idx = headers.index("whitelisted domains") + 1
-        else:
-            col_idx = 4
-    except Exception:
-        col_idx = 4
+        return tuple(wb.active.iter_rows(min_row=1, values_only=True))
+    finally:
+        wb.close()
+
+def read_whitelist(xlsx_path: str) -> List[str]:
+    it = iter(read_xlsx_rows(xlsx_path))
+    headers = [str(v).strip().lower() if v is not None else "" for v in next(it, ())]
+    col_idx = headers.index("whitelisted domains") if "whitelisted domains" in headers else 3
     domains = []
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if len(row) >= col_idx:
-            cell = row[col_idx - 1]
+    for row in it:
+        if len(row) > col_idx:
+            cell = row[col_idx]
             if isinstance(cell, str):
                 d = cell.strip().lower()
                 if d and "." in d:
                     domains.append(d)
-    wb.close()
-    seen = set()
-    out = []
-    for d in domains:
-        if d not in seen:
-            seen.add(d)
-            out.append(d)
-    return out
+    return list(dict.fromkeys(domains))
 
 def read_keywords_map(xlsx_path: str) -> Dict[str, List[str]]:
-    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
-    ws = wb.active
-    headers = [str(c.value).strip().lower() if c.value is not None else "" for c in next(ws.iter_rows(min_row=1, max_row=1))]
+    rows = read_xlsx_rows(xlsx_path)
+    headers = [str(v).strip().lower() if v is not None else "" for v in (rows[0] if rows else ())]
     try:
         d_idx = headers.index("whitelisted domains") + 1 if "whitelisted domains" in headers else 4
     except Exception:
@@ -56,7 +74,7 @@ def read_keywords_map(xlsx_path: str) -> Dict[str, List[str]]:
     except Exception:
         o_idx = None
     m: Dict[str, List[str]] = {}
-    for row in ws.iter_rows(min_row=2, values_only=True):
+    for row in rows[1:]:
         dom = None
         org = None
         if len(row) >= d_idx:
@@ -77,14 +95,7 @@ def read_keywords_map(xlsx_path: str) -> Dict[str, List[str]]:
                 if words:
                     kws.append("".join(words))
                     kws.extend(words)
-            uniq = []
-            seen = set()
-            for k in kws:
-                if k and k not in seen:
-                    seen.add(k)
-                    uniq.append(k)
-            m[dom] = uniq
-    wb.close()
+            m[dom] = [k for k in dict.fromkeys(kws) if k]
     return m
 
 def read_extra_keywords(path: str) -> List[str]:
@@ -96,52 +107,73 @@ def read_extra_keywords(path: str) -> List[str]:
             w = line.strip().lower()
             if w:
                 out.append(w)
-    seen = set()
-    uniq = []
-    for w in out:
-        if w not in seen:
-            seen.add(w)
-            uniq.append(w)
-    return uniq
-
-def run_dnstwist(domain: str, tlds_path: Optional[str], dict_words: Optional[List[str]] = None) -> Tuple[List[str], List[Dict[str, str]]]:
-    cmd = ["dnstwist", "--registered"]
+    return list(dict.fromkeys(out))
+
+DNSTWIST_NAMESERVERS = os.getenv("DNSTWIST_NAMESERVERS", "")
+DNSTWIST_POOL: Optional[cf.ProcessPoolExecutor] = None
+DNSTWIST_POOL_LOCK = threading.Lock()
+
+def dnstwist_pool() -> cf.ProcessPoolExecutor:
+    global DNSTWIST_POOL
+    with DNSTWIST_POOL_LOCK:
+        if DNSTWIST_POOL is None:
+            try:
+                workers = int(os.getenv("DNSTWIST_WORKERS") or 0)
+            except Exception:
+                workers = 0
+            if workers <= 0:
+                workers = os.cpu_count() or 4
+            DNSTWIST_POOL = cf.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return DNSTWIST_POOL
+
+def dnstwist_scan(domain: str, tlds_path: Optional[str], dict_words: Optional[List[str]]) -> List[Dict[str, object]]:
+    import dnstwist
+    kwargs = {"domain": domain, "registered": True, "format": "null"}
     if tlds_path:
-        cmd += ["--tld", tlds_path]
+        kwargs["tld"] = tlds_path
+    if DNSTWIST_NAMESERVERS:
+        kwargs["nameservers"] = DNSTWIST_NAMESERVERS
     tmp_path = None
     if dict_words:
         try:
-            tf = tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8")
-            for w in dict_words:
-                tf.write(w + "\n")
-            tf.flush()
-            tmp_path = tf.name
-            tf.close()
-            cmd += ["--dictionary", tmp_path]
+            with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8") as tf:
+                tf.write("\n".join(dict_words) + "\n")
+                tmp_path = tf.name
+            kwargs["dictionary"] = tmp_path
         except Exception:
             tmp_path = None
-    cmd += ["--format", "csv", domain]
-    p = subprocess.run(cmd, capture_output=True, text=True)
-    if tmp_path:
-        try:
-            os.unlink(tmp_path)
-        except Exception:
-            pass
-    if p.returncode != 0 or not p.stdout.strip():
-        return [], []
-    sio = StringIO(p.stdout)
-    reader = csv.reader(sio)
-    rows = list(reader)
-    if not rows:
+    try:
+        return dnstwist.run(**kwargs) or []
+    finally:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except Exception:
+                pass
+
+def dnstwist_cell(v: object) -> str:
+    if isinstance(v, list):
+        return ";".join(str(x) for x in v)
+    if v is None:
+        return ""
+    return str(v)
+
+def submit_dnstwist(domain: str, tlds_path: Optional[str], dict_words: Optional[List[str]] = None) -> cf.Future:
+    return dnstwist_pool().submit(dnstwist_scan, domain, tlds_path, dict_words)
+
+def dnstwist_rows(fut: cf.Future) -> Tuple[List[str], List[List[str]]]:
+    try:
+        found = fut.result()
+    except Exception:
+        found = []
+    if not found:
         return [], []
-    header = rows[0]
-    data = []
-    for r in rows[1:]:
-        item = {}
-        for i, k in enumerate(header):
-            item[str(k)] = r[i] if i < len(r) else ""
-        data.append(item)
-    return [str(h) for h in header], data
+    extra = set()
+    for r in found:
+        extra.update(r.keys())
+    header = ["fuzzer", "domain"] + sorted(extra - {"fuzzer", "domain"})
+    data = [[dnstwist_cell(r.get(k)) for k in header] for r in found]
+    return header, data
 
 PLATFORM_BASES = {
     "ngrok": "ngrok.io",
@@ -191,11 +223,14 @@ PLATFORM_CNAME_MARKERS = {
     "azureweb": ["azurewebsites.net"],
 }
 
+PLATFORM_BY_BASE = {v: k for k, v in reversed(list(PLATFORM_BASES.items()))}
+PLATFORM_SUFFIX_RE = re.compile("|".join(re.escape(b[::-1]) for b in sorted(PLATFORM_BY_BASE, key=len, reverse=True)))
+
 def classify_platform(domain: str, cname_chain: Optional[List[str]] = None) -> Optional[str]:
     dl = domain.lower()
-    for k, base in PLATFORM_BASES.items():
-        if dl.endswith("." + base) or dl == base or dl.endswith(base):
-            return k
+    m = PLATFORM_SUFFIX_RE.match(dl[::-1])
+    if m:
+        return PLATFORM_BY_BASE[m.group(0)[::-1]]
     if cname_chain:
         joined = ",".join([c.lower() for c in cname_chain])
         for k, markers in PLATFORM_CNAME_MARKERS.items():
@@ -204,51 +239,221 @@ def classify_platform(domain: str, cname_chain: Optional[List[str]] = None) -> O
                     return k
     return None
 
-def get_cname_chain(name: str, timeout: float = 3.0) -> List[str]:
+CRTSH_URL = "https://crt.sh/"
+CRTSH_CACHE_DIR = os.getenv("CRTSH_CACHE_DIR") or os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)), "sus", ".cache", "crtsh")
+try:
+    CRTSH_CACHE_TTL = int(os.getenv("CRTSH_CACHE_TTL") or 86400)
+except Exception:
+    CRTSH_CACHE_TTL = 86400
+CRTSH_NO_CACHE = (os.getenv("CRTSH_NO_CACHE") or "").strip().lower() in {"1", "true", "yes"}
+
+CRTSH_RETRY_STATUS = {429, 502, 503, 504}
+CRTSH_ATTEMPTS = 5
+try:
+    CRTSH_RATE = float(os.getenv("CRTSH_RATE") or 10)
+except Exception:
+    CRTSH_RATE = 10.0
+CRTSH_NEXT_SLOT = 0.0
+try:
+    CRTSH_READ_TIMEOUT = float(os.getenv("CRTSH_READ_TIMEOUT") or 30)
+except Exception:
+    CRTSH_READ_TIMEOUT = 30.0
+try:
+    CRTSH_ATTEMPT_TIMEOUT = float(os.getenv("CRTSH_ATTEMPT_TIMEOUT") or 300)
+except Exception:
+    CRTSH_ATTEMPT_TIMEOUT = 300.0
+try:
+    CRTSH_CONCURRENCY = int(os.getenv("CRTSH_CONCURRENCY") or 20)
+except Exception:
+    CRTSH_CONCURRENCY = 20
+CRTSH_SEM = asyncio.Semaphore(max(1, CRTSH_CONCURRENCY))
+
+HTTP_LOOP: Optional[asyncio.AbstractEventLoop] = None
+HTTP_SESSION: Optional[aiohttp.ClientSession] = None
+HTTP_LOCK = threading.Lock()
+
+def http_loop() -> asyncio.AbstractEventLoop:
+    global HTTP_LOOP
+    with HTTP_LOCK:
+        if HTTP_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True).start()
+            HTTP_LOOP = loop
+        return HTTP_LOOP
+
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, http_loop()).result()
+
+def close_http() -> None:
+    global HTTP_LOOP, HTTP_SESSION
+    with HTTP_LOCK:
+        if HTTP_LOOP is None:
+            return
+        if HTTP_SESSION is not None:
+            asyncio.run_coroutine_threadsafe(HTTP_SESSION.close(), HTTP_LOOP).result()
+            HTTP_SESSION = None
+        HTTP_LOOP.call_soon_threadsafe(HTTP_LOOP.stop)
+        HTTP_LOOP = None
+
+async def http_session() -> aiohttp.ClientSession:
+    global HTTP_SESSION
+    if HTTP_SESSION is None:
+        connector = aiohttp.TCPConnector(limit=200, limit_per_host=32, ttl_dns_cache=300, keepalive_timeout=60)
+        HTTP_SESSION = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=None, connect=5, sock_read=CRTSH_READ_TIMEOUT), headers={"Accept-Encoding": "gzip, deflate"})
+    return HTTP_SESSION
+
+async def crtsh_throttle() -> None:
+    global CRTSH_NEXT_SLOT
+    if CRTSH_RATE <= 0:
+        return
+    now = asyncio.get_running_loop().time()
+    slot = max(now, CRTSH_NEXT_SLOT)
+    CRTSH_NEXT_SLOT = slot + 1.0 / CRTSH_RATE
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+def crtsh_cache_path(q: str) -> Optional[str]:
+    if CRTSH_NO_CACHE or CRTSH_CACHE_TTL <= 0:
+        return None
+    key = hashlib.sha1(q.encode("utf-8")).hexdigest()
+    return os.path.join(CRTSH_CACHE_DIR, key + ".names.json.gz")
+
+async def crtsh_fetch(session: aiohttp.ClientSession, q: str) -> Tuple[int, Dict[str, None]]:
+    names: Dict[str, None] = {}
+    async with session.get(CRTSH_URL, params={"q": q, "output": "json", "deduplicate": "Y"}) as resp:
+        if resp.status != 200:
+            return resp.status, names
+        async for value in ijson.items(resp.content, "item.name_value"):
+            for line in str(value).split("\n"):
+                d = line.strip().lower()
+                if d:
+                    names[d] = None
+    return 200, names
+
+def crtsh_cache_load(path: str) -> Optional[List[str]]:
+    try:
+        if time.time() - os.path.getmtime(path) < CRTSH_CACHE_TTL:
+            with gzip.open(path, "rb") as f:
+                data = f.read()
+            return JSON_LOADS(data)
+    except Exception:
+        pass
+    return None
+
+def crtsh_cache_store(path: str, out: List[str]) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CRTSH_CACHE_DIR, exist_ok=True)
+        with gzip.open(tmp, "wb") as f:
+            f.write(orjson.dumps(out) if orjson is not None else json.dumps(out).encode("utf-8"))
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except Exception:
+            pass
+
+async def crtsh_names(q: str) -> List[str]:
+    loop = asyncio.get_running_loop()
+    path = crtsh_cache_path(q)
+    if path:
+        cached = await loop.run_in_executor(None, crtsh_cache_load, path)
+        if cached is not None:
+            return cached
+    session = await http_session()
+    names: Dict[str, None] = {}
+    for attempt in range(CRTSH_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(min(30.0, 2.0 ** (attempt - 1)))
+        await crtsh_throttle()
+        try:
+            async with CRTSH_SEM:
+                status, names = await asyncio.wait_for(crtsh_fetch(session, q), CRTSH_ATTEMPT_TIMEOUT)
+        except ijson.JSONError:
+            continue
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == CRTSH_ATTEMPTS - 1:
+                raise
+            continue
+        if status in CRTSH_RETRY_STATUS:
+            continue
+        if status != 200:
+            return []
+        break
+    else:
+        return []
+    out = list(names)
+    if path:
+        await loop.run_in_executor(None, crtsh_cache_store, path, out)
+    return out
+
+async def fetch_ct_keyword(keyword: str) -> List[str]:
+    try:
+        names = await crtsh_names(f"%{keyword}%")
+        return [d for d in names if keyword in d and "." in d]
+    except Exception:
+        return []
+
+async def gather_ct(keywords: List[str]) -> Dict[str, None]:
+    found = await asyncio.gather(*[fetch_ct_keyword(kw) for kw in keywords], return_exceptions=True)
+    names: Dict[str, None] = {}
+    for r in found:
+        if isinstance(r, list):
+            names.update(dict.fromkeys(r))
+    return names
+
+try:
+    CNAME_CONCURRENCY = int(os.getenv("CNAME_CONCURRENCY") or 256)
+except Exception:
+    CNAME_CONCURRENCY = 256
+CNAME_SEM = asyncio.Semaphore(max(1, CNAME_CONCURRENCY))
+CNAME_NAMESERVERS = [x.strip() for x in (os.getenv("CNAME_NAMESERVERS") or "").split(",") if x.strip()]
+CNAME_RESOLVER: Optional[dns.asyncresolver.Resolver] = None
+CNAME_CHAINS: Dict[str, List[str]] = {}
+
+def cname_resolver() -> dns.asyncresolver.Resolver:
+    global CNAME_RESOLVER
+    if CNAME_RESOLVER is None:
+        resolver = dns.asyncresolver.Resolver()
+        resolver.cache = dns.resolver.LRUCache(10000)
+        resolver.timeout = 1.0
+        resolver.rotate = True
+        if CNAME_NAMESERVERS:
+            resolver.nameservers = CNAME_NAMESERVERS
+        CNAME_RESOLVER = resolver
+    return CNAME_RESOLVER
+
+async def get_cname_chain(name: str, timeout: float = 2.0) -> List[str]:
+    cached = CNAME_CHAINS.get(name)
+    if cached is not None:
+        return cached
     out = []
     try:
-        resolver = dns.resolver.Resolver()
-        resolver.lifetime = timeout
+        resolver = cname_resolver()
         target = name
         seen = set()
-        for _ in range(5):
-            if target in seen:
-                break
-            seen.add(target)
-            try:
-                ans = resolver.resolve(target, "CNAME")
-                if not ans:
+        async with CNAME_SEM:
+            for _ in range(5):
+                if target in seen:
+                    break
+                seen.add(target)
+                try:
+                    ans = await resolver.resolve(target, "CNAME", lifetime=timeout)
+                    if not ans:
+                        break
+                    cn = str(ans[0].target).rstrip('.')
+                    out.append(cn)
+                    target = cn
+                except Exception:
                     break
-                cn = str(ans[0].target).rstrip('.')
-                out.append(cn)
-                target = cn
-            except Exception:
-                break
     except Exception:
-        return out
+        pass
+    CNAME_CHAINS[name] = out
     return out
 
-def fetch_ct_keyword(keyword: str) -> List[str]:
-    try:
-        params = {"q": f"%{keyword}%", "output": "json"}
-        r = requests.get("https://crt.sh/", params=params, timeout=20)
-        if r.status_code != 200 or not r.text.strip():
-            return []
-        data = json.loads(r.text)
-        out = []
-        seen = set()
-        for entry in data:
-            name = entry.get("name_value")
-            if not name:
-                continue
-            for line in str(name).split("\n"):
-                d = line.strip().lower()
-                if keyword in d and d not in seen and "." in d:
-                    seen.add(d)
-                    out.append(d)
-        return out
-    except Exception:
-        return []
+async def gather_cname_chains(names: List[str]) -> List[List[str]]:
+    found = await asyncio.gather(*[get_cname_chain(n) for n in names], return_exceptions=True)
+    return [r if isinstance(r, list) else [] for r in found]
 
 def collect_certstream(keywords: List[str], seconds: int = 0, limit: int = 2000) -> List[str]:
     if seconds <= 0:
@@ -282,24 +487,74 @@ def collect_certstream(keywords: List[str], seconds: int = 0, limit: int = 2000)
         return acc
     return acc
 
-def collect_from_zonefiles(dir_path: str, keywords: List[str], max_lines: int = 0) -> List[str]:
-    if not dir_path or not os.path.isdir(dir_path):
-        return []
-    out = []
+KW_AUTOMATON_MIN = 8
+
+def keyword_index(keywords_by_domain: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    index: Dict[str, List[str]] = {}
+    for d, kws in keywords_by_domain.items():
+        for k in dict.fromkeys(kws):
+            if k:
+                index.setdefault(k, []).append(d)
+    return index
+
+def keyword_automaton(index: Dict[str, List[str]]):
+    if ahocorasick is None or len(index) < KW_AUTOMATON_MIN:
+        return None
+    A = ahocorasick.Automaton()
+    for k, doms in index.items():
+        A.add_word(k, doms)
+    A.make_automaton()
+    return A
+
+def match_domains(s: str, A, index: Dict[str, List[str]]) -> set:
+    matched = set()
+    if A is not None:
+        for _, doms in A.iter(s):
+            matched.update(doms)
+    else:
+        for k, doms in index.items():
+            if k in s:
+                matched.update(doms)
+    return matched
+
+SCAN_POOL: Optional[cf.ProcessPoolExecutor] = None
+SCAN_POOL_LOCK = threading.Lock()
+
+def scan_pool() -> cf.ProcessPoolExecutor:
+    global SCAN_POOL
+    with SCAN_POOL_LOCK:
+        if SCAN_POOL is None:
+            try:
+                workers = int(os.getenv("SCAN_WORKERS") or 0)
+            except Exception:
+                workers = 0
+            if workers <= 0:
+                workers = os.cpu_count() or 4
+            SCAN_POOL = cf.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return SCAN_POOL
+
+def scan_files(fn, files: List[str], keywords_by_domain: Dict[str, List[str]], max_lines: int) -> List[dict]:
+    pool = scan_pool()
+    futs = [pool.submit(fn, p, keywords_by_domain, max_lines) for p in files]
+    return [f.result() for f in futs]
+
+SCAN_READ_ERRORS = (OSError, EOFError, zlib.error)
+
+def open_text(p: str):
+    if p.endswith('.gz'):
+        return gzip.open(p, 'rt', encoding='utf-8', errors='ignore')
+    return open(p, 'r', encoding='utf-8', errors='ignore')
+
+def scan_zonefile(p: str, keywords_by_domain: Dict[str, List[str]], max_lines: int = 0) -> Dict[str, List[str]]:
+    out: Dict[str, List[str]] = {}
     seen = set()
-    files = []
-    for name in os.listdir(dir_path):
-        p = os.path.join(dir_path, name)
-        if os.path.isfile(p) and (name.endswith('.txt') or name.endswith('.zone') or name.endswith('.gz')):
-            files.append(p)
-    for p in files:
-        try:
-            if p.endswith('.gz'):
-                fh = gzip.open(p, 'rt', encoding='utf-8', errors='ignore')
-            else:
-                fh = open(p, 'r', encoding='utf-8', errors='ignore')
-        except Exception:
-            continue
+    index = keyword_index(keywords_by_domain)
+    A = keyword_automaton(index)
+    try:
+        fh = open_text(p)
+    except Exception:
+        return out
+    try:
         with fh:
             n = 0
             for line in fh:
@@ -309,210 +564,210 @@ def collect_from_zonefiles(dir_path: str, keywords: List[str], max_lines: int =
                 s = line.strip().lower()
                 if not s or s.startswith(';') or ' ' in s:
                     continue
-                if '.' not in s:
+                if '.' not in s or s in seen:
                     continue
-                for kw in keywords:
-                    if kw in s:
-                        if s not in seen:
-                            seen.add(s)
-                            out.append(s)
-                        break
+                hits = match_domains(s, A, index)
+                if not hits:
+                    continue
+                seen.add(s)
+                for d in hits:
+                    out.setdefault(d, []).append(s)
+    except SCAN_READ_ERRORS:
+        pass
     return out
 
-def collect_from_sonar(dir_path: str, keywords: List[str], max_lines: int = 0) -> List[Tuple[str, Optional[str]]]:
+def collect_from_zonefiles(dir_path: str, keywords_by_domain: Dict[str, List[str]], max_lines: int = 0) -> Dict[str, List[str]]:
     if not dir_path or not os.path.isdir(dir_path):
-        return []
-    out = []
-    seen = set()
+        return {}
     files = []
     for name in os.listdir(dir_path):
         p = os.path.join(dir_path, name)
-        if os.path.isfile(p) and (name.endswith('.csv') or name.endswith('.csv.gz') or name.endswith('.json') or name.endswith('.json.gz')):
+        if os.path.isfile(p) and (name.endswith('.txt') or name.endswith('.zone') or name.endswith('.gz')):
             files.append(p)
+    if not files:
+        return {}
+    merged: Dict[str, Dict[str, None]] = {}
+    for part in scan_files(scan_zonefile, files, keywords_by_domain, max_lines):
+        for d, names in part.items():
+            merged.setdefault(d, {}).update(dict.fromkeys(names))
+    return {d: list(names) for d, names in merged.items()}
+
+def scan_sonar_file(p: str, keywords_by_domain: Dict[str, List[str]], max_lines: int = 0) -> Dict[str, List[Tuple[str, Optional[str]]]]:
+    out: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+    domains = list(keywords_by_domain)
     markers = []
     for arr in PLATFORM_CNAME_MARKERS.values():
         markers.extend(arr)
-    def parse_line(line: str) -> Tuple[str, str]:
-        s = line.strip()
-        if not s:
-            return '', ''
-        if s.startswith('{'):
-            try:
-                obj = json.loads(s)
-                name = str(obj.get('name') or obj.get('domain') or obj.get('host') or '').lower()
-                value = str(obj.get('value') or obj.get('data') or obj.get('target') or '').lower()
-                return name, value
-            except Exception:
-                return '', ''
-        parts = s.split(',', 1)
-        if len(parts) == 1:
-            return parts[0].lower(), ''
-        return parts[0].lower(), parts[1].lower()
-    for p in files:
-        try:
-            if p.endswith('.gz'):
-                fh = gzip.open(p, 'rt', encoding='utf-8', errors='ignore')
-            else:
-                fh = open(p, 'r', encoding='utf-8', errors='ignore')
-        except Exception:
-            continue
+    index = keyword_index(keywords_by_domain)
+    A = keyword_automaton(index)
+    kw_hits: Dict[str, set] = {}
+    marker_done = set()
+    is_json = p.endswith('.json') or p.endswith('.json.gz')
+    try:
+        fh = open_text(p)
+    except Exception:
+        return out
+    try:
         with fh:
             n = 0
             for line in fh:
                 if max_lines and n >= max_lines:
                     break
                 n += 1
-                name, value = parse_line(line)
-                if not name or '.' not in name:
+                if is_json:
+                    try:
+                        obj = JSON_LOADS(line)
+                        name = str(obj.get('name') or obj.get('domain') or obj.get('host') or '').lower()
+                        value = str(obj.get('value') or obj.get('data') or obj.get('target') or '')
+                    except Exception:
+                        continue
+                else:
+                    name, _, value = line.strip().partition(',')
+                    name = name.lower()
+                if not name or '.' not in name or name in marker_done:
                     continue
-                hit = False
-                for kw in keywords:
-                    if kw in name:
-                        hit = True
+                hit = kw_hits.get(name)
+                if hit is None:
+                    hit = match_domains(name, A, index)
+                    if hit:
+                        kw_hits[name] = hit
+                        for d in hit:
+                            out.setdefault(d, []).append((name, None))
+                if not value or len(hit) == len(domains):
+                    continue
+                value = value.lower()
+                for m in markers:
+                    if m in value:
+                        src = classify_platform(name, [value])
+                        marker_done.add(name)
+                        for d in domains:
+                            if d not in hit:
+                                out.setdefault(d, []).append((name, src))
                         break
-                src = None
-                if not hit and value:
-                    for m in markers:
-                        if m in value:
-                            src = classify_platform(name, [value]) or src
-                            hit = True
-                            break
-                if hit:
-                    if name not in seen:
-                        seen.add(name)
-                        out.append((name, src))
+    except SCAN_READ_ERRORS:
+        pass
     return out
 
-def read_existing_csv(path: str) -> Tuple[List[str], List[Dict[str, str]]]:
+def collect_from_sonar(dir_path: str, keywords_by_domain: Dict[str, List[str]], max_lines: int = 0) -> Dict[str, List[Tuple[str, Optional[str]]]]:
+    if not dir_path or not os.path.isdir(dir_path):
+        return {}
+    files = []
+    for name in os.listdir(dir_path):
+        p = os.path.join(dir_path, name)
+        if os.path.isfile(p) and (name.endswith('.csv') or name.endswith('.csv.gz') or name.endswith('.json') or name.endswith('.json.gz')):
+            files.append(p)
+    if not files:
+        return {}
+    merged: Dict[str, Dict[str, Optional[str]]] = {}
+    for part in scan_files(scan_sonar_file, files, keywords_by_domain, max_lines):
+        for d, hits in part.items():
+            got = merged.setdefault(d, {})
+            for name, src in hits:
+                if name not in got:
+                    got[name] = src
+    return {d: list(hits.items()) for d, hits in merged.items()}
+
+def read_existing_csv(path: str) -> Tuple[List[str], List[List[str]]]:
     with open(path, "r", encoding="utf-8", newline="") as f:
         reader = csv.reader(f)
-        rows = list(reader)
-    if not rows:
-        return [], []
-    header = [str(x) for x in rows[0]]
-    data = []
-    for r in rows[1:]:
-        item = {}
-        for i, k in enumerate(header):
-            item[k] = r[i] if i < len(r) else ""
-        data.append(item)
-    return header, data
+        header = next(reader, None)
+        if header is None:
+            return [], []
+        return header, list(reader)
 
-def key_field(header: List[str]) -> str:
+@functools.lru_cache(maxsize=1024)
+def header_key_field(header: Tuple[str, ...]) -> str:
     for k in header:
         if str(k).strip().lower() in {"domain", "fqdn"}:
             return k
     return header[0] if header else "domain"
 
-def merge_rows(h1: List[str], rows1: List[Dict[str, str]], h2: List[str], rows2: List[Dict[str, str]]) -> Tuple[List[str], List[Dict[str, str]]]:
+def key_field(header: List[str]) -> str:
+    return header_key_field(tuple(header))
+
+def merge_rows(h1: List[str], rows1: List[List[str]], h2: List[str], rows2: List[List[Optional[str]]]) -> Tuple[List[str], List[List[str]], int, bool]:
     k1 = key_field(h1) if h1 else None
     k2 = key_field(h2) if h2 else None
-    header = []
-    seenh = set()
-    for k in (h1 or []):
-        if k not in seenh:
-            seenh.add(k)
-            header.append(k)
-    for k in (h2 or []):
-        if k not in seenh:
-            seenh.add(k)
-            header.append(k)
+    header = list(dict.fromkeys((h1 or []) + (h2 or [])))
     if not header and k2:
         header = [k2]
-    index = {}
+    pos1 = {k: i for i, k in enumerate(h1 or [])}
+    pos2 = {k: i for i, k in enumerate(h2 or [])}
+    map1 = [pos1.get(k) for k in header]
+    map2 = [(j, pos2[k]) for j, k in enumerate(header) if k in pos2]
+    i1 = pos1[k1] if k1 else None
+    i2 = pos2[k2] if k2 else None
+    index: Dict[str, int] = {}
     out = []
-    if rows1:
-        for r in rows1:
-            out.append(dict(r))
-            idx_key = r.get(k1) if k1 else None
-            if idx_key is not None:
-                index[idx_key] = len(out) - 1
-    if rows2:
-        for r in rows2:
-            src_key = r.get(k2) if k2 else None
-            if src_key is not None and src_key in index:
-                i = index[src_key]
-                merged = out[i]
-                for k in r.keys():
-                    merged[k] = r[k]
-                out[i] = merged
-            else:
-                out.append(dict(r))
-                if src_key is not None:
-                    index[src_key] = len(out) - 1
-    norm_out = []
-    for r in out:
-        norm = {}
-        for k in header:
-            norm[k] = r.get(k, "")
-        norm_out.append(norm)
-    return header, norm_out
-
-def write_csv(path: str, header: List[str], rows: List[Dict[str, str]]):
+    width = len(header)
+    same = header[:len(h1 or [])] == (h1 or [])
+    for r in rows1 or []:
+        n = len(r)
+        if i1 is not None:
+            index[r[i1] if i1 < n else ""] = len(out)
+        if not same:
+            r = [r[i] if i is not None and i < n else "" for i in map1]
+        elif n < width:
+            r.extend([""] * (width - n))
+        elif n > width:
+            r = r[:width]
+        out.append(r)
+    n1 = len(out)
+    updated = False
+    for r in rows2 or []:
+        n = len(r)
+        src_key = r[i2] if i2 is not None and i2 < n else None
+        pos = index.get(src_key) if src_key is not None else None
+        if pos is None:
+            pos = len(out)
+            out.append([""] * width)
+            if src_key is not None:
+                index[src_key] = pos
+        row = out[pos]
+        for j, i in map2:
+            if i < n and r[i] is not None:
+                if pos < n1 and row[j] != r[i]:
+                    updated = True
+                row[j] = r[i]
+    return header, out, len(out) - n1, updated
+
+def write_csv(path: str, header: List[str], rows: List[List[Optional[str]]]):
     tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        for r in rows:
-            writer.writerow([r.get(k, "") for k in header])
-    os.replace(tmp, path)
-
-def process_domain(domain: str, out_dir: str, tlds_path: Optional[str], keywords: List[str], certstream_seconds: int, dict_words: Optional[List[str]], zone_dir: Optional[str], sonar_dir: Optional[str], zone_cap: int, sonar_cap: int) -> Tuple[str, int, int, int]:
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+WRITE_POOL = cf.ThreadPoolExecutor(max_workers=1)
+WRITE_FUTS: List[Tuple[str, cf.Future]] = []
+
+def submit_write(fn, path: str, *args):
+    WRITE_FUTS.append((path, WRITE_POOL.submit(fn, path, *args)))
+
+def append_csv(path: str, rows: List[List[str]]):
+    with open(path, "a", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        csv.writer(f).writerows(rows)
+
+def process_domain(domain: str, out_dir: str, tlds_path: Optional[str], keywords: List[str], certstream_seconds: int, dict_words: Optional[List[str]], z: List[str], sonar: List[Tuple[str, Optional[str]]]) -> Tuple[str, int, int, int]:
     s = time.time()
-    h2, r2 = run_dnstwist(domain, tlds_path, dict_words)
+    twist = submit_dnstwist(domain, tlds_path, dict_words)
     ct_rows = []
-    def fetch_platform_kw(kw: str, plat: str, base: str):
-        try:
-            params = {"q": f"%{kw}%.{base}", "output": "json"}
-            r = requests.get("https://crt.sh/", params=params, timeout=20)
-            if r.status_code != 200 or not r.text:
-                return []
-            data = json.loads(r.text)
-            out = []
-            seen_local = set()
-            for entry in data:
-                name = entry.get("name_value")
-                if not name:
-                    continue
-                for line in str(name).split("\n"):
-                    d = line.strip().lower()
-                    if d.endswith(base) and kw in d and d not in seen_local:
-                        seen_local.add(d)
-                        out.append(d)
-            return out
-        except Exception:
-            return []
-    with cf.ThreadPoolExecutor(max_workers=8) as ex:
-        futs = []
-        for kw in keywords:
-            for plat, base in PLATFORM_BASES.items():
-                futs.append(ex.submit(fetch_platform_kw, kw, plat, base))
-        results = []
-        for f in futs:
-            try:
-                results.extend(f.result())
-            except Exception:
-                pass
-    gen = []
-    with cf.ThreadPoolExecutor(max_workers=min(8, max(1, len(keywords)))) as ex:
-        futs = [ex.submit(fetch_ct_keyword, kw) for kw in keywords]
-        for f in futs:
-            try:
-                gen.extend(f.result())
-            except Exception:
-                pass
+    candidates = run_async(gather_ct(keywords))
     if certstream_seconds and certstream_seconds > 0:
         cs = collect_certstream(keywords, seconds=certstream_seconds, limit=4000)
     else:
         cs = []
-    z = collect_from_zonefiles(zone_dir, keywords, max_lines=zone_cap) if zone_dir else []
-    sonar = collect_from_sonar(sonar_dir, keywords, max_lines=sonar_cap) if sonar_dir else []
-    candidates = []
-    seen_d = set()
-    for d in results + gen + cs + z + [n for n, _ in sonar]:
-        if d not in seen_d:
-            seen_d.add(d)
-            candidates.append(d)
+    candidates.update(dict.fromkeys(cs))
+    candidates.update(dict.fromkeys(z))
+    candidates.update(dict.fromkeys(n for n, _ in sonar))
     classified = []
     no_class = []
     for d in candidates:
@@ -522,27 +777,21 @@ def process_domain(domain: str, out_dir: str, tlds_path: Optional[str], keywords
         else:
             no_class.append(d)
     if no_class:
-        with cf.ThreadPoolExecutor(max_workers=16) as ex:
-            futs = {ex.submit(get_cname_chain, d): d for d in no_class}
-            for f in cf.as_completed(futs):
-                d = futs[f]
-                try:
-                    chain = f.result()
-                except Exception:
-                    chain = []
-                src = classify_platform(d, chain)
-                if src:
-                    classified.append((d, src))
+        for d, chain in zip(no_class, run_async(gather_cname_chains(no_class))):
+            src = classify_platform(d, chain)
+            if src:
+                classified.append((d, src))
     for n, src in sonar:
         if src:
             classified.append((n, src))
+    h2, r2 = dnstwist_rows(twist)
     # Add CZDS NRD hits and Sonar PDNS hits
     for d in z:
-        ct_rows.append({"domain": d, "type": "nrd", "source": "czds"})
+        ct_rows.append((d, "nrd", "czds"))
     for n, src in sonar:
-        ct_rows.append({"domain": n, "type": "pdns", "source": src or "sonar"})
+        ct_rows.append((n, "pdns", src or "sonar"))
     for d, src in classified:
-        ct_rows.append({"domain": d, "type": "ct_log", "source": src})
+        ct_rows.append((d, "ct_log", src))
     if ct_rows:
         if not h2:
             h2 = ["domain", "type", "source"]
@@ -550,31 +799,30 @@ def process_domain(domain: str, out_dir: str, tlds_path: Optional[str], keywords
         for col in ["domain", "type", "source"]:
             if col not in existing_cols:
                 h2.append(col)
-        r2.extend(ct_rows)
+        width = len(h2)
+        for r in r2:
+            if len(r) < width:
+                r.extend([None] * (width - len(r)))
+        di, ti, si = h2.index("domain"), h2.index("type"), h2.index("source")
+        for d, typ, src in ct_rows:
+            row = [None] * width
+            row[di] = d
+            row[ti] = typ
+            row[si] = src
+            r2.append(row)
     if not h2 and not r2:
         return domain, 0, 0, int(time.time() - s)
     out_path = os.path.join(out_dir, f"{domain}.csv")
     if os.path.isfile(out_path):
         h1, r1 = read_existing_csv(out_path)
-        k1 = key_field(h1) if h1 else None
-        k2 = key_field(h2) if h2 else None
-        existing = set()
-        if k1:
-            for r in r1:
-                v = r.get(k1)
-                if v is not None:
-                    existing.add(v)
-        added = 0
-        if k2:
-            for r in r2:
-                v = r.get(k2)
-                if v is not None and v not in existing:
-                    added += 1
-        h, rows = merge_rows(h1, r1, h2, r2)
-        write_csv(out_path, h, rows)
+        h, rows, added, updated = merge_rows(h1, r1, h2, r2)
+        if updated or h != h1:
+            submit_write(write_csv, out_path, h, rows)
+        elif added:
+            submit_write(append_csv, out_path, rows[len(r1):])
         return domain, added, len(rows), int(time.time() - s)
     else:
-        write_csv(out_path, h2, r2)
+        submit_write(write_csv, out_path, h2, r2)
         return domain, len(r2), len(r2), int(time.time() - s)
 
 def main():
@@ -597,7 +845,7 @@ def main():
     except Exception:
         env_workers_val = None
     cpu = os.cpu_count() or 4
-    workers = min(total, env_workers_val if env_workers_val and env_workers_val > 0 else cpu)
+    workers = min(total, env_workers_val if env_workers_val and env_workers_val > 0 else 4 * cpu)
     cs_secs_env = os.getenv("CERTSTREAM_SECONDS")
     try:
         certstream_seconds = int(cs_secs_env) if cs_secs_env else 0
@@ -608,11 +856,7 @@ def main():
     base_extra = [
         "login","secure","verify","update","support","helpdesk","banking","kyc","otp","pay","payment","bill","recharge","claim","policy","ipo","ipoapply","apply","card","credit","debit","netbanking","online","account"
     ]
-    seenb = set(extra_kws)
-    for w in base_extra:
-        if w not in seenb:
-            extra_kws.append(w)
-            seenb.add(w)
+    extra_kws = list(dict.fromkeys(extra_kws + base_extra))
     dict_map: Dict[str, List[str]] = {}
     for d, kws in kw_map.items():
         s = set(kws)
@@ -634,36 +878,30 @@ def main():
     except Exception:
         sonar_cap = 0
     print(f"domains:{total} workers:{workers}", flush=True)
-    stop = threading.Event()
     start = time.time()
+    zone_hits = collect_from_zonefiles(zone_dir, kw_map, max_lines=zone_cap) if zone_dir else {}
+    sonar_hits = collect_from_sonar(sonar_dir, kw_map, max_lines=sonar_cap) if sonar_dir else {}
     with cf.ThreadPoolExecutor(max_workers=workers) as ex:
-        futs = [ex.submit(process_domain, d, out_dir, tlds_path, kw_map.get(d, []), certstream_seconds, dict_map.get(d), zone_dir, sonar_dir, zone_cap, sonar_cap) for d in domains]
-        def status():
-            frames = ["|", "/", "-", "\\"]
-            i = 0
-            while not stop.is_set():
-                done = sum(1 for f in futs if f.done())
-                running = sum(1 for f in futs if f.running())
-                pending = total - done - running
-                elapsed = int(time.time() - start)
-                s = f"\r[{frames[i]}] running:{running} done:{done}/{total} pending:{pending} elapsed:{elapsed}s"
-                print(s, end="", flush=True)
-                i = (i + 1) % 4
-                time.sleep(0.2)
-        th = threading.Thread(target=status, daemon=True)
-        th.start()
+        futs = [ex.submit(process_domain, d, out_dir, tlds_path, kw_map.get(d, []), certstream_seconds, dict_map.get(d), zone_hits.get(d, []), sonar_hits.get(d, [])) for d in domains]
         done_count = 0
-        for f in cf.as_completed(futs):
+        for f in tqdm(cf.as_completed(futs), total=total, unit="domain"):
             try:
                 domain, added, total_rows, dur = f.result()
             except Exception:
                 domain, added, total_rows, dur = "unknown", 0, 0, 0
             done_count += 1
-            sys.stdout.write("\r" + " " * 120 + "\r")
-            sys.stdout.flush()
-            print(f"[{done_count}/{total}] {domain} added:{added} total:{total_rows} time:{dur}s", flush=True)
-        stop.set()
-        th.join()
+            tqdm.write(f"[{done_count}/{total}] {domain} added:{added} total:{total_rows} time:{dur}s")
+    WRITE_POOL.shutdown()
+    for path, f in WRITE_FUTS:
+        try:
+            f.result()
+        except Exception as e:
+            tqdm.write(f"write failed {path}: {e}")
+    if DNSTWIST_POOL is not None:
+        DNSTWIST_POOL.shutdown()
+    if SCAN_POOL is not None:
+        SCAN_POOL.shutdown()
+    close_http()
     elapsed = int(time.time() - start)
     print(f"done elapsed:{elapsed}s", flush=True)
 